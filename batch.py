@@ -0,0 +1,140 @@
+"""Replay a JSONL stream of operations against data loaded once in memory.
+
+Each input line is an object such as
+    {"op": "hotel.create", "args": {"hotel_id": "H1", "name": "Inn",
+                                    "location": "NYC", "total_rooms": 10}}
+where "args" is a dict of keyword arguments or a list of positional ones.
+Every operation produces one JSONL result line on stdout, and the run ends
+with a summary line. Data files are written at checkpoints and at the end;
+failed writes are counted in the summary and make the exit code non-zero.
+
+Usage:
+    python batch.py [ops.jsonl] [--checkpoint-every N]
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from importlib import import_module
+
+OPERATIONS = {
+    'hotel.create': ('models.hotel', 'Hotel', 'create'),
+    'hotel.delete': ('models.hotel', 'Hotel', 'delete'),
+    'hotel.display': ('models.hotel', 'Hotel', 'display'),
+    'hotel.modify': ('models.hotel', 'Hotel', 'modify'),
+    'hotel.stats': ('models.hotel', 'Hotel', 'stats'),
+    'customer.create': ('models.customer', 'Customer', 'create'),
+    'customer.delete': ('models.customer', 'Customer', 'delete'),
+    'customer.display': ('models.customer', 'Customer', 'display'),
+    'customer.modify': ('models.customer', 'Customer', 'modify'),
+    'reservation.create': ('models.reservation', 'Reservation', 'create'),
+    'reservation.cancel': ('models.reservation', 'Reservation', 'cancel'),
+}
+DEFAULT_CHECKPOINT_EVERY = 1000
+
+
+def resolve(op_name):
+    """Return the model method for an operation name, importing it on first use."""
+    module_name, class_name, method_name = OPERATIONS[op_name]
+    return getattr(getattr(import_module(module_name), class_name), method_name)
+
+
+def parse(line):
+    """Return (op_name, args) for an input line, raising ValueError if malformed."""
+    request = json.loads(line)
+    if not isinstance(request, dict) or request.get('op') not in OPERATIONS:
+        raise ValueError(f"Unknown or missing operation in: {line.strip()}")
+    args = request.get('args', {})
+    if not isinstance(args, (dict, list)):
+        raise ValueError("'args' must be an object or a list.")
+    return request['op'], args
+
+
+def execute(line_no, line):
+    """Run one input line and return its result record."""
+    result = {'line': line_no, 'op': None, 'ok': False}
+    captured = io.StringIO()
+    try:
+        op_name, args = parse(line)
+        result['op'] = op_name
+        method = resolve(op_name)
+        with redirect_stdout(captured):
+            value = method(*args) if isinstance(args, list) else method(**args)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        # One bad line must not stop the run; it is reported in its result.
+        result['error'] = f"{type(error).__name__}: {error}"
+    else:
+        result['ok'] = value is not None and value is not False
+        if hasattr(value, 'to_dict'):
+            result['result'] = value.to_dict()
+        elif isinstance(value, dict):
+            result['result'] = value
+    messages = captured.getvalue().splitlines()
+    if messages:
+        result['messages'] = messages
+    return result
+
+
+def _count_checkpoint(summary, unwritten):
+    """Add one checkpoint's outcome (the paths it could not write) to summary."""
+    summary['checkpoints'] += not unwritten
+    summary['write_errors'] += len(unwritten)
+
+
+def run(lines, out, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+    """Execute every non-blank line, writing JSONL results to out.
+
+    Returns the summary record, which is also written as the last line.
+    """
+    # Imported lazily so that --help and argument errors stay fast.
+    from models.persistence import (  # pylint: disable=import-outside-toplevel
+        batch_mode, checkpoint,
+    )
+
+    summary = {'ops': 0, 'ok': 0, 'failed': 0, 'checkpoints': 0, 'write_errors': 0}
+    log = io.StringIO()
+    start = time.perf_counter()
+    # Messages printed while writing files are captured, so that out stays
+    # valid JSONL even when out is sys.stdout; they go into the summary.
+    with redirect_stdout(log), batch_mode():
+        for line_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            result = execute(line_no, line)
+            out.write(json.dumps(result) + '\n')
+            summary['ops'] += 1
+            summary['ok' if result['ok'] else 'failed'] += 1
+            if checkpoint_every and summary['ops'] % checkpoint_every == 0:
+                _count_checkpoint(summary, checkpoint())
+        _count_checkpoint(summary, checkpoint())
+    elapsed = time.perf_counter() - start
+    summary['seconds'] = round(elapsed, 6)
+    summary['ops_per_sec'] = round(summary['ops'] / elapsed, 1) if elapsed else None
+    messages = log.getvalue().splitlines()
+    if messages:
+        summary['messages'] = messages
+    out.write(json.dumps({'summary': summary}) + '\n')
+    return summary
+
+
+def main(argv=None):
+    """Parse arguments, run the stream and return the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', nargs='?', default='-',
+                        help="JSONL file of operations ('-' for stdin)")
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help='write data files every N operations (0 = only at the end)')
+    args = parser.parse_args(argv)
+    if args.source == '-':
+        summary = run(sys.stdin, sys.stdout, args.checkpoint_every)
+    else:
+        with open(args.source, 'r', encoding='utf-8') as file:
+            summary = run(file, sys.stdout, args.checkpoint_every)
+    return 1 if summary['failed'] or summary['write_errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Benchmark: threaded Hotel.reserve_room vs a global-lock full rewrite.
+
+Each thread books rooms in its own hotel. The baseline holds one lock for
+a load_data/modify/save_data cycle per booking, which is what every write
+did before per-record versions and the append-only log.
+
+Run from the project root:
+
+    python -m benchmarks.bench_concurrency [threads] [hotels] [ops_per_thread]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import models.hotel as hotel_module
+from models.hotel import Hotel
+from models.persistence import load_data, save_data
+
+GLOBAL_LOCK = threading.Lock()
+
+
+def _seed(path, hotels, rooms):
+    """Write a hotels file with the given number of records."""
+    save_data(path, {
+        f'H{i}': Hotel(f'H{i}', f'Hotel {i}', 'Somewhere', rooms).to_dict()
+        for i in range(hotels)
+    })
+
+
+def _global_lock_reserve(path, hotel_id, reservation_id):
+    """Book a room by rewriting the whole file under one global lock."""
+    with GLOBAL_LOCK:
+        data = load_data(path)
+        record = data[hotel_id]
+        record['available_rooms'] -= 1
+        record['reservations'].append(reservation_id)
+        save_data(path, data)
+
+
+def _model_reserve(_path, hotel_id, reservation_id):
+    """Book a room through the model's optimistic commit."""
+    Hotel.reserve_room(hotel_id, reservation_id)
+
+
+def _timed(reserve, path, threads, ops):
+    """Run ops bookings on each of threads threads; return elapsed seconds."""
+    def worker(index):
+        for op in range(ops):
+            reserve(path, f'H{index}', f'R{index}-{op}')
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main(threads=8, hotels=200, ops=100):
+    """Print bookings per second for both write paths."""
+    total = threads * ops
+    print(f"{threads} threads, {hotels} hotels, {ops} bookings per thread")
+    print(f"{'path':<14}{'ops/s':>10}")
+    for name, reserve in (('global lock', _global_lock_reserve),
+                          ('reserve_room', _model_reserve)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'hotels.json')
+            hotel_module.DATA_FILE = path
+            _seed(path, hotels, ops)
+            elapsed = _timed(reserve, path, threads, ops)
+            booked = sum(len(load_data(path)[f'H{i}']['reservations']) for i in range(threads))
+            assert booked == total, f"{name}: {booked} of {total} bookings stored"
+            print(f"{name:<14}{total / elapsed:>10.0f}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:4]))
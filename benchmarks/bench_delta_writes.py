@@ -0,0 +1,74 @@
+"""Benchmark: bytes written by single-field modifies, full rewrite vs delta.
+
+Run from the project root:
+
+    python -m benchmarks.bench_delta_writes [hotels] [updates]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import models.hotel as hotel_module
+from models.hotel import Hotel
+from models.persistence import delta_file, fold_changes, load_data, save_data
+
+
+def _seed(path, hotels):
+    """Write a hotels file with the given number of records."""
+    save_data(path, {
+        f'H{i}': Hotel(f'H{i}', f'Hotel {i}', 'Somewhere', 50).to_dict()
+        for i in range(hotels)
+    })
+
+
+def _full_rewrite(path, updates):
+    """Rename hotels by rewriting the whole file; return (bytes, seconds)."""
+    written = 0
+    start = time.perf_counter()
+    for i in range(updates):
+        data = load_data(path)
+        data['H0']['name'] = f'Renamed {i}'
+        save_data(path, data)
+        written += os.path.getsize(path)
+    return written, time.perf_counter() - start
+
+
+def _delta(path, updates):
+    """Rename hotels through Hotel.modify; return (bytes, seconds)."""
+    written = 0
+    start = time.perf_counter()
+    for i in range(updates):
+        before = _size(delta_file(path))
+        Hotel.modify('H0', name=f'Renamed {i}')
+        after = _size(delta_file(path))
+        written += after - before if after >= before else os.path.getsize(path)
+    return written, time.perf_counter() - start
+
+
+def _size(path):
+    """Return the size of path, or 0 if it does not exist."""
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def main(hotels=1000, updates=200):
+    """Print bytes written per update for both write paths."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'hotels.json')
+        hotel_module.DATA_FILE = path
+        _seed(path, hotels)
+        print(f"{hotels} hotels, base file {os.path.getsize(path)} bytes, {updates} updates")
+
+        full_bytes, full_secs = _full_rewrite(path, updates)
+        fold_changes(path)
+        delta_bytes, delta_secs = _delta(path, updates)
+
+        print(f"{'path':<14}{'bytes/update':>14}{'ms/update':>12}")
+        for name, total, secs in (('full rewrite', full_bytes, full_secs),
+                                  ('delta', delta_bytes, delta_secs)):
+            print(f"{name:<14}{total / updates:>14.0f}{secs * 1000 / updates:>12.2f}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -20,6 +20,7 @@ def main():
 
     print("\n=== Reservations ===")
     Reservation.create('RES1', 'C1', 'H1', '2025-06-01', '2025-06-05')
+    print(Hotel.stats('H1'))
     Reservation.cancel('RES1')
 
     print("\n=== Cleanup ===")
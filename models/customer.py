@@ -1,19 +1,23 @@
 """Module for Customer class with file-based persistence."""
 
 import os
-from models.persistence import load_data, save_data
+from models.persistence import load_data, compare_and_set, delete_record
+from models.tracking import TrackedRecord
 
 DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'customers.json')
 
 
-class Customer:
+class Customer(TrackedRecord):
     """Represents a customer with contact info."""
 
+    TRACKED_FIELDS = ('name', 'email', 'phone')
+
     def __init__(self, customer_id, name, email, phone):
         self.customer_id = str(customer_id)
         self.name = name
         self.email = email
         self.phone = phone
+        self.version = 0
 
     def to_dict(self):
         """Serialize customer to dictionary."""
@@ -22,41 +26,41 @@ class Customer:
             'name': self.name,
             'email': self.email,
             'phone': self.phone,
+            'version': self.version,
         }
 
     @classmethod
     def from_dict(cls, data):
         """Deserialize customer from dictionary."""
-        return cls(
+        customer = cls(
             data['customer_id'],
             data['name'],
             data['email'],
             data['phone'],
         )
+        customer.version = data.get('version', 0)
+        customer.mark_clean()
+        return customer
 
     @staticmethod
     def create(customer_id, name, email, phone):
         """Create and persist a new customer."""
-        customers = load_data(DATA_FILE)
         customer_id = str(customer_id)
-        if customer_id in customers:
+        customer = Customer(customer_id, name, email, phone)
+        record = customer.to_dict()
+        if not compare_and_set(DATA_FILE, customer_id, None, record):
             print(f"[ERROR] Customer '{customer_id}' already exists.")
             return None
-        customer = Customer(customer_id, name, email, phone)
-        customers[customer_id] = customer.to_dict()
-        save_data(DATA_FILE, customers)
+        customer.version = record['version']
         return customer
 
     @staticmethod
     def delete(customer_id):
         """Delete a customer by ID."""
-        customers = load_data(DATA_FILE)
         customer_id = str(customer_id)
-        if customer_id not in customers:
+        if not delete_record(DATA_FILE, customer_id):
             print(f"[ERROR] Customer '{customer_id}' not found.")
             return False
-        del customers[customer_id]
-        save_data(DATA_FILE, customers)
         return True
 
     @staticmethod
@@ -75,17 +79,10 @@ class Customer:
 
     @staticmethod
     def modify(customer_id, **kwargs):
-        """Modify editable fields of an existing customer."""
-        customers = load_data(DATA_FILE)
-        customer_id = str(customer_id)
-        if customer_id not in customers:
-            print(f"[ERROR] Customer '{customer_id}' not found.")
-            return False
+        """Modify editable fields of an existing customer.
+
+        Retries on version conflicts, so concurrent updates to other
+        customers never block or overwrite this one.
+        """
         allowed = {'name', 'email', 'phone'}
-        for key, value in kwargs.items():
-            if key in allowed:
-                customers[customer_id][key] = value
-            else:
-                print(f"[WARN] Field '{key}' is not modifiable or unknown.")
-        save_data(DATA_FILE, customers)
-        return True
+        return Customer.modify_stored(DATA_FILE, str(customer_id), allowed, kwargs) is not None
@@ -0,0 +1,23 @@
+"""Strict YYYY-MM-DD date parsing shared by reservations and statistics."""
+
+import re
+from datetime import date
+
+# Checked before date.fromisoformat, which also accepts other ISO 8601 forms
+# such as '20250602' on Python 3.11+.
+ISO_DATE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+
+
+def to_ordinal(value):
+    """Convert a YYYY-MM-DD string or a date to a day ordinal.
+
+    Raises ValueError for anything else, including bare ints and bools.
+    """
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and ISO_DATE.fullmatch(value):
+        try:
+            return date.fromisoformat(value).toordinal()
+        except ValueError as error:
+            raise ValueError(f"Invalid date '{value}': expected YYYY-MM-DD.") from error
+    raise ValueError(f"Invalid date {value!r}: expected YYYY-MM-DD.")
@@ -1,14 +1,26 @@
 """Module for Hotel class with file-based persistence."""
 
 import os
-from models.persistence import load_data, save_data
+from importlib import import_module
+from models.persistence import (
+    load_data, compare_and_set, delete_record, read_record, update_record,
+)
+from models.tracking import TrackedRecord
+from models.stats import empty_stats, is_current, recompute, summarize
 
 DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'hotels.json')
 
 
-class Hotel:
+def stats_file():
+    """Return the per-hotel statistics file stored next to DATA_FILE."""
+    return os.path.splitext(DATA_FILE)[0] + '_stats.json'
+
+
+class Hotel(TrackedRecord):
     """Represents a hotel with rooms and reservation tracking."""
 
+    TRACKED_FIELDS = ('name', 'location', 'total_rooms', 'available_rooms', 'reservations')
+
     def __init__(self, hotel_id, name, location, total_rooms):
         self.hotel_id = str(hotel_id)
         self.name = name
@@ -16,6 +28,7 @@ class Hotel:
         self.total_rooms = int(total_rooms)
         self.available_rooms = int(total_rooms)
         self.reservations = []
+        self.version = 0
 
     def to_dict(self):
         """Serialize hotel to dictionary."""
@@ -26,6 +39,7 @@ class Hotel:
             'total_rooms': self.total_rooms,
             'available_rooms': self.available_rooms,
             'reservations': self.reservations,
+            'version': self.version,
         }
 
     @classmethod
@@ -39,31 +53,31 @@ class Hotel:
         )
         hotel.available_rooms = data.get('available_rooms', hotel.total_rooms)
         hotel.reservations = data.get('reservations', [])
+        hotel.version = data.get('version', 0)
+        hotel.mark_clean()
         return hotel
 
     @staticmethod
     def create(hotel_id, name, location, total_rooms):
         """Create and persist a new hotel."""
-        hotels = load_data(DATA_FILE)
         hotel_id = str(hotel_id)
-        if hotel_id in hotels:
+        hotel = Hotel(hotel_id, name, location, total_rooms)
+        record = hotel.to_dict()
+        if not compare_and_set(DATA_FILE, hotel_id, None, record):
             print(f"[ERROR] Hotel '{hotel_id}' already exists.")
             return None
-        hotel = Hotel(hotel_id, name, location, total_rooms)
-        hotels[hotel_id] = hotel.to_dict()
-        save_data(DATA_FILE, hotels)
+        hotel.version = record['version']
+        update_record(stats_file(), hotel_id, lambda _: empty_stats(hotel.total_rooms))
         return hotel
 
     @staticmethod
     def delete(hotel_id):
         """Delete a hotel by ID."""
-        hotels = load_data(DATA_FILE)
         hotel_id = str(hotel_id)
-        if hotel_id not in hotels:
+        if not delete_record(DATA_FILE, hotel_id):
             print(f"[ERROR] Hotel '{hotel_id}' not found.")
             return False
-        del hotels[hotel_id]
-        save_data(DATA_FILE, hotels)
+        delete_record(stats_file(), hotel_id)
         return True
 
     @staticmethod
@@ -82,50 +96,121 @@ class Hotel:
 
     @staticmethod
     def modify(hotel_id, **kwargs):
-        """Modify editable fields of an existing hotel."""
-        hotels = load_data(DATA_FILE)
+        """Modify editable fields of an existing hotel.
+
+        Retries on version conflicts, so concurrent updates to other hotels
+        never block or overwrite this one. total_rooms is converted to an
+        int first; an invalid value changes nothing.
+        """
         hotel_id = str(hotel_id)
-        if hotel_id not in hotels:
-            print(f"[ERROR] Hotel '{hotel_id}' not found.")
-            return False
+        if 'total_rooms' in kwargs:
+            try:
+                total_rooms = int(kwargs['total_rooms'])
+            except (TypeError, ValueError):
+                total_rooms = None
+            if total_rooms is None or total_rooms < 0:
+                print(f"[ERROR] Invalid total_rooms {kwargs['total_rooms']!r} "
+                      f"for hotel '{hotel_id}'.")
+                return False
+            kwargs['total_rooms'] = total_rooms
         allowed = {'name', 'location', 'total_rooms'}
-        for key, value in kwargs.items():
-            if key in allowed:
-                hotels[hotel_id][key] = value
-            else:
-                print(f"[WARN] Field '{key}' is not modifiable or unknown.")
-        save_data(DATA_FILE, hotels)
+        changes = Hotel.modify_stored(DATA_FILE, hotel_id, allowed, kwargs)
+        if changes is None:
+            return False
+        if 'total_rooms' in changes:
+            Hotel.update_stats(hotel_id, lambda record: dict(
+                record, total_rooms=changes['total_rooms']))
         return True
 
+    @staticmethod
+    def stats(hotel_id, today=None):
+        """Return reservation statistics for a hotel without scanning reservations.
+
+        The result holds active, cancelled and upcoming reservation counts,
+        occupancy (fraction of rooms occupied on the night of today) and the
+        average active stay in nights. today is a date or a YYYY-MM-DD
+        string and defaults to the current date.
+        """
+        hotel_id = str(hotel_id)
+        record = read_record(stats_file(), hotel_id)
+        if not is_current(record):
+            record = Hotel.update_stats(hotel_id, lambda record: record)
+        if record is None:
+            print(f"[ERROR] No statistics for hotel '{hotel_id}'.")
+            return None
+        try:
+            return summarize(record, today)
+        except ValueError as error:
+            print(f"[ERROR] {error}")
+            return None
+
+    @staticmethod
+    def update_stats(hotel_id, mutate):
+        """Apply mutate to a hotel's stats record and return the result.
+
+        A hotel without a record (e.g. created before statistics existed)
+        or with an outdated one gets it rebuilt from the stored reservations
+        instead. Those already include the change mutate describes, so
+        mutate is not applied then. Returns None if the hotel does not exist.
+        """
+        hotel_id = str(hotel_id)
+        return update_record(
+            stats_file(), hotel_id,
+            lambda record: mutate(record) if is_current(record) else Hotel.rebuild_stats(hotel_id),
+        )
+
+    @staticmethod
+    def rebuild_stats(hotel_id):
+        """Return a hotel's stats record recomputed from stored reservations.
+
+        Scans every reservation, so it is only used when the record is
+        missing. Returns None if the hotel does not exist.
+        """
+        # Imported lazily because models.reservation imports this module.
+        reservation = import_module('models.reservation')
+        hotel = read_record(DATA_FILE, str(hotel_id))
+        if hotel is None:
+            return None
+        return recompute(
+            {str(hotel_id): hotel},
+            load_data(reservation.DATA_FILE),
+            reservation.stored_date_range,
+        )[str(hotel_id)]
+
     @staticmethod
     def reserve_room(hotel_id, reservation_id):
         """Decrease available rooms and register reservation_id."""
-        hotels = load_data(DATA_FILE)
         hotel_id = str(hotel_id)
-        if hotel_id not in hotels:
-            print(f"[ERROR] Hotel '{hotel_id}' not found.")
-            return False
-        if hotels[hotel_id]['available_rooms'] <= 0:
-            print(f"[ERROR] No available rooms in hotel '{hotel_id}'.")
-            return False
-        hotels[hotel_id]['available_rooms'] -= 1
-        hotels[hotel_id]['reservations'].append(str(reservation_id))
-        save_data(DATA_FILE, hotels)
-        return True
+        reservation_id = str(reservation_id)
+
+        def apply(record):
+            if record is None:
+                print(f"[ERROR] Hotel '{hotel_id}' not found.")
+                return None
+            if record['available_rooms'] <= 0:
+                print(f"[ERROR] No available rooms in hotel '{hotel_id}'.")
+                return None
+            record['available_rooms'] -= 1
+            record['reservations'].append(reservation_id)
+            return record
+
+        return update_record(DATA_FILE, hotel_id, apply) is not None
 
     @staticmethod
     def cancel_room(hotel_id, reservation_id):
         """Increase available rooms and remove reservation_id."""
-        hotels = load_data(DATA_FILE)
         hotel_id = str(hotel_id)
         reservation_id = str(reservation_id)
-        if hotel_id not in hotels:
-            print(f"[ERROR] Hotel '{hotel_id}' not found.")
-            return False
-        if reservation_id not in hotels[hotel_id]['reservations']:
-            print(f"[ERROR] Reservation '{reservation_id}' not in hotel.")
-            return False
-        hotels[hotel_id]['reservations'].remove(reservation_id)
-        hotels[hotel_id]['available_rooms'] += 1
-        save_data(DATA_FILE, hotels)
-        return True
+
+        def apply(record):
+            if record is None:
+                print(f"[ERROR] Hotel '{hotel_id}' not found.")
+                return None
+            if reservation_id not in record['reservations']:
+                print(f"[ERROR] Reservation '{reservation_id}' not in hotel.")
+                return None
+            record['reservations'].remove(reservation_id)
+            record['available_rooms'] += 1
+            return record
+
+        return update_record(DATA_FILE, hotel_id, apply) is not None
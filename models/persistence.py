@@ -2,14 +2,44 @@
 
 import json
 import os
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+MAX_RETRIES = 50
+LOCK_STALE_SECONDS = 10.0
+DELTA_FOLD_BYTES = 64 * 1024
+
+_THREAD_LOCKS = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+_BATCH = {'files': None}
+
+
+def delta_file(filepath):
+    """Return the path of the append-only change log kept next to filepath."""
+    return f"{filepath}.delta"
 
 
 def load_data(filepath):
     """Load a JSON file and return its contents as a dict.
 
-    Returns an empty dict if the file does not exist or contains invalid data.
-    Errors are printed to the console and execution continues.
+    Pending changes from the delta file are applied on top of the base
+    file. Returns an empty dict if the file does not exist or contains
+    invalid data. Errors are printed to the console and execution continues.
     """
+    files = _BATCH['files']
+    if files is not None:
+        key = os.path.abspath(filepath)
+        if key not in files:
+            files[key] = {'path': filepath, 'data': _read_file(filepath), 'dirty': False}
+        return files[key]['data']
+    return _read_file(filepath)
+
+
+def _read_base(filepath):
+    """Read only the base JSON file of filepath, or None if it is unreadable."""
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     if not os.path.exists(filepath):
         return {}
@@ -18,17 +48,464 @@ def load_data(filepath):
             return json.load(file)
     except (json.JSONDecodeError, IOError) as error:
         print(f"[ERROR] Failed to load data from '{filepath}': {error}")
-        return {}
+        return None
+
+
+def _read_file(filepath):
+    """Read the base file and pending delta of filepath from disk.
+
+    If another writer folds the delta in between the two reads, the new
+    delta would be applied to the old base, so the read is retried until
+    the base file's stamp is the same before and after it.
+    """
+    while True:
+        stamp = _file_stamp(filepath)
+        data = _read_base(filepath)
+        if data is None:
+            return {}
+        try:
+            with open(delta_file(filepath), 'rb') as file:
+                _apply_lines(data, file.read())
+        except FileNotFoundError:
+            pass
+        except IOError as error:
+            print(f"[ERROR] Failed to load changes from '{delta_file(filepath)}': {error}")
+        if _file_stamp(filepath) == stamp:
+            return data
+
+
+def _apply_lines(data, chunk):
+    """Apply every complete log line in chunk; return the bytes consumed."""
+    end = chunk.rfind(b'\n') + 1
+    for line in chunk[:end].splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            print("[WARN] Skipping unreadable change log entry.")
+            continue
+        _apply_entry(data, entry)
+    return end
+
+
+def _apply_entry(data, entry):
+    """Apply one log entry unless the stored record is already newer.
+
+    Entries that belong to another incarnation of the key (a record that
+    was deleted and created again) are ignored, so a stale log left by an
+    interrupted fold cannot touch the record that replaced it.
+    """
+    key = entry['key']
+    current = data.get(key)
+    operation = entry.get('op', 'update')
+    if operation == 'put':
+        record = entry['record']
+        if current is None:
+            data[key] = record
+        elif (_creation_id(record) == _creation_id(current)
+              and record_version(record) > record_version(current)):
+            data[key] = record
+    elif current is None or entry.get('creation_id') != _creation_id(current):
+        return
+    elif operation == 'delete':
+        del data[key]
+    elif entry['changes']['version'] > record_version(current):
+        current.update(entry['changes'])
+
+
+def _creation_id(record):
+    """Return the id of the incarnation a record belongs to (None if legacy)."""
+    return record.get('creation_id')
 
 
 def save_data(filepath, data):
     """Persist a dict to a JSON file.
 
+    The data is written to a temporary file that then replaces the target,
+    so concurrent readers never observe a partially written file. The data
+    is expected to come from load_data, so pending changes in the delta
+    file are already included and the delta file is removed. In batch mode
+    the data is only kept in memory until the next checkpoint.
     Errors are printed to the console and execution continues.
     """
+    files = _BATCH['files']
+    if files is not None:
+        files[os.path.abspath(filepath)] = {'path': filepath, 'data': data, 'dirty': True}
+        return
+    _write_file(filepath, data)
+
+
+def _write_file(filepath, data):
+    """Atomically write data to filepath and drop its delta file.
+
+    Returns True on success, False if the write failed.
+    """
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    temp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        with open(filepath, 'w', encoding='utf-8') as file:
+        with open(temp_path, 'w', encoding='utf-8') as file:
             json.dump(data, file, indent=4)
+        os.replace(temp_path, filepath)
     except IOError as error:
         print(f"[ERROR] Failed to save data to '{filepath}': {error}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+    if os.path.exists(delta_file(filepath)):
+        os.remove(delta_file(filepath))
+    return True
+
+
+def _file_stamp(filepath):
+    """Return a cheap fingerprint that changes whenever filepath is rewritten."""
+    try:
+        info = os.stat(filepath)
+    except OSError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+
+class _FileView:
+    """In-process copy of a data file, kept current by tailing its delta log.
+
+    The base file is parsed only when its stamp changes (i.e. after a
+    fold); otherwise a refresh reads just the log lines appended since the
+    previous one. Incomplete trailing lines are left for the next refresh.
+    """
+
+    _STALE = object()
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.lock = threading.RLock()
+        self.stamp = self._STALE
+        self.delta_inode = None
+        self.offset = 0
+        self.data = {}
+
+    def refresh(self):
+        """Bring the view up to date with the files on disk."""
+        with self.lock:
+            while True:
+                stamp = _file_stamp(self.filepath)
+                if stamp != self.stamp:
+                    self.data = _read_base(self.filepath) or {}
+                    self.stamp = stamp
+                    self.delta_inode = None
+                    self.offset = 0
+                self._tail()
+                if _file_stamp(self.filepath) == self.stamp:
+                    return
+
+    def _tail(self):
+        """Apply log lines appended since the last refresh."""
+        try:
+            with open(delta_file(self.filepath), 'rb') as file:
+                info = os.fstat(file.fileno())
+                if self.delta_inode not in (None, info.st_ino) or info.st_size < self.offset:
+                    self.stamp = self._STALE
+                    return
+                self.delta_inode = info.st_ino
+                file.seek(self.offset)
+                self.offset += _apply_lines(self.data, file.read())
+        except FileNotFoundError:
+            if self.offset:
+                self.stamp = self._STALE
+
+    def append(self, entry):
+        """Append entry to the log and apply it; the commit guard must be held."""
+        path = delta_file(self.filepath)
+        with open(path, 'ab') as file:
+            if file.tell() > self.offset:
+                file.truncate(self.offset)
+            file.write(json.dumps(entry).encode('utf-8') + b'\n')
+            self.offset = file.tell()
+            self.delta_inode = os.fstat(file.fileno()).st_ino
+        _apply_entry(self.data, entry)
+        if self.offset > DELTA_FOLD_BYTES:
+            self.fold()
+
+    def fold(self):
+        """Rewrite the base file from the view; the commit guard must be held.
+
+        If the write fails the delta is kept, so nothing is lost.
+        """
+        if not _write_file(self.filepath, self.data):
+            return
+        self.stamp = _file_stamp(self.filepath)
+        self.delta_inode = None
+        self.offset = 0
+
+
+_VIEWS = {}
+
+
+def _view(filepath):
+    """Return the refreshed shared view of filepath."""
+    key = os.path.abspath(filepath)
+    with _THREAD_LOCKS_GUARD:
+        view = _VIEWS.setdefault(key, _FileView(filepath))
+    view.refresh()
+    return view
+
+
+def read_record(filepath, key):
+    """Return a copy of one stored record, or None if it does not exist.
+
+    Reads through the shared view, so only newly logged changes are parsed.
+    """
+    if _BATCH['files'] is not None:
+        return _copy_record(load_data(filepath).get(key))
+    view = _view(filepath)
+    with view.lock:
+        return _copy_record(view.data.get(key))
+
+
+def record_keys(filepath):
+    """Return the set of record keys stored in filepath.
+
+    The keys come from the shared view, so existence checks skip the JSON
+    parse unless the base file was rewritten. In batch mode a live view of
+    the in-memory keys is returned.
+    """
+    if _BATCH['files'] is not None:
+        return load_data(filepath).keys()
+    return _view(filepath).data.keys()
+
+
+def iter_records(filepath):
+    """Yield the (key, record) pairs stored in filepath, one at a time.
+
+    The pairs come from the shared view, so nothing is re-parsed or copied
+    and the file is not materialized a second time. The records are shared
+    with the view and must not be modified.
+    """
+    if _BATCH['files'] is not None:
+        yield from list(load_data(filepath).items())
+        return
+    view = _view(filepath)
+    with view.lock:
+        items = list(view.data.items())
+    yield from items
+
+
+def _thread_lock(filepath):
+    """Return the in-process lock associated with filepath."""
+    key = os.path.abspath(filepath)
+    with _THREAD_LOCKS_GUARD:
+        return _THREAD_LOCKS.setdefault(key, threading.Lock())
+
+
+@contextmanager
+def _commit_guard(filepath):
+    """Hold a short exclusive section for the validate-and-write step.
+
+    Threads are serialized with an in-process lock and processes with a
+    lock file created atomically next to the data file. A lock file older
+    than LOCK_STALE_SECONDS is assumed to be left over by a crashed writer.
+    Batch mode owns the data exclusively, so no lock is taken.
+    """
+    if _BATCH['files'] is not None:
+        yield
+        return
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    lock_path = f"{filepath}.lock"
+    with _thread_lock(filepath):
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.0005)
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+
+
+def _copy_record(value):
+    """Copy JSON-shaped data (dicts, lists, scalars) faster than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {key: _copy_record(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_record(item) if isinstance(item, (dict, list)) else item
+                for item in value]
+    return value
+
+
+def record_version(record):
+    """Return the version counter of a stored record (0 for legacy records)."""
+    return record.get('version', 0)
+
+
+@contextmanager
+def _locked_data(filepath):
+    """Hold the commit guard and yield (data, commit) for filepath.
+
+    data is the current state; commit(entry) makes one log entry durable
+    and applies it. In batch mode both act on the in-memory copy.
+    """
+    with _commit_guard(filepath):
+        if _BATCH['files'] is not None:
+            data = load_data(filepath)
+
+            def commit(entry):
+                _apply_entry(data, entry)
+                save_data(filepath, data)
+
+            yield data, commit
+            return
+        view = _view(filepath)
+        with view.lock:
+            yield view.data, view.append
+
+
+def compare_and_set(filepath, key, expected_version, record):
+    """Atomically replace one record if its version is still expected_version.
+
+    An expected_version of None means the key must not exist yet (insert).
+    On success the stored record gets version expected_version + 1 (or 1
+    for inserts) and True is returned; if another writer got there first,
+    False is returned and nothing changes. The record is appended to the
+    delta log, so the commit costs O(record), not O(file). Inserts get a
+    new creation_id, which later versions of the record keep.
+    """
+    with _locked_data(filepath) as (data, commit):
+        current = data.get(key)
+        if expected_version is None:
+            if current is not None:
+                return False
+            record['creation_id'] = secrets.token_hex(8)
+        elif current is None or record_version(current) != expected_version:
+            return False
+        elif 'creation_id' in current:
+            record['creation_id'] = current['creation_id']
+        record['version'] = 1 if expected_version is None else expected_version + 1
+        commit({'op': 'put', 'key': key, 'record': _copy_record(record)})
+        return True
+
+
+def append_changes(filepath, key, expected_version, changes):
+    """Atomically log new field values for one record if its version matches.
+
+    Only the changed fields are appended to the delta file, so a single
+    field update writes O(record) bytes instead of rewriting the whole
+    file. Once the delta file grows past DELTA_FOLD_BYTES it is folded
+    into the base file. Returns True on success, False on a version
+    conflict or when the record does not exist.
+    """
+    with _locked_data(filepath) as (data, commit):
+        current = data.get(key)
+        if current is None or record_version(current) != expected_version:
+            return False
+        changes['version'] = expected_version + 1
+        commit({'op': 'update', 'key': key, 'creation_id': _creation_id(current),
+                'changes': _copy_record(changes)})
+        return True
+
+
+def fold_changes(filepath):
+    """Merge any pending delta file into the base file."""
+    if _BATCH['files'] is not None:
+        return
+    with _commit_guard(filepath):
+        view = _view(filepath)
+        with view.lock:
+            if os.path.exists(delta_file(filepath)):
+                view.fold()
+
+
+@contextmanager
+def batch_mode():
+    """Keep every data file in memory for the duration of the block.
+
+    Each file is read from disk once; writes only update the in-memory copy
+    until checkpoint() is called or the block ends. The caller must be the
+    only writer of the data files while the block is active.
+    """
+    _BATCH['files'] = {}
+    try:
+        yield
+    finally:
+        checkpoint()
+        _BATCH['files'] = None
+
+
+def checkpoint():
+    """Write every file changed in batch mode to disk.
+
+    Returns the list of paths that could not be written; those stay
+    pending, so the next checkpoint tries them again.
+    """
+    files = _BATCH['files'] or {}
+    failed = []
+    for entry in files.values():
+        if not entry['dirty']:
+            continue
+        if _write_file(entry['path'], entry['data']):
+            entry['dirty'] = False
+        else:
+            failed.append(entry['path'])
+    return failed
+
+
+def delete_record(filepath, key):
+    """Remove one record regardless of its version.
+
+    Returns True if the record existed and was removed, False otherwise.
+    """
+    with _locked_data(filepath) as (data, commit):
+        if key not in data:
+            return False
+        commit({'op': 'delete', 'key': key, 'creation_id': _creation_id(data[key])})
+        return True
+
+
+def update_record(filepath, key, mutate, max_retries=MAX_RETRIES):
+    """Apply mutate to one record using optimistic compare-and-set retries.
+
+    mutate receives a copy of the current record (None when the key is
+    missing) and returns the updated record, or None to abort. It may be
+    called several times, so it should not have side effects besides
+    reporting why it aborts. Returns the committed record, or None if the
+    mutation was aborted or every attempt conflicted with another writer.
+    """
+    for attempt in range(max_retries):
+        current = read_record(filepath, key)
+        expected = None if current is None else record_version(current)
+        updated = mutate(current)
+        if updated is None:
+            return None
+        if compare_and_set(filepath, key, expected, updated):
+            return updated
+        time.sleep(random.uniform(0, 0.001 * (attempt + 1)))
+    print(f"[ERROR] Too many concurrent updates to '{key}' in '{filepath}'.")
+    return None
+
+
+def update_fields(filepath, key, mutate, max_retries=MAX_RETRIES):
+    """Apply mutate to one record and persist only the fields it changes.
+
+    Works like update_record, except that mutate returns a dict of changed
+    fields (possibly empty) instead of the whole record, and the change is
+    written through append_changes. Returns the committed record, or None
+    if the mutation was aborted or every attempt conflicted.
+    """
+    for attempt in range(max_retries):
+        current = read_record(filepath, key)
+        changes = mutate(_copy_record(current))
+        if changes is None:
+            return None
+        if not changes:
+            return current
+        if append_changes(filepath, key, record_version(current), changes):
+            current.update(changes)
+            return current
+        time.sleep(random.uniform(0, 0.001 * (attempt + 1)))
+    print(f"[ERROR] Too many concurrent updates to '{key}' in '{filepath}'.")
+    return None
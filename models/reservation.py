@@ -1,27 +1,127 @@
 """Module for Reservation class with file-based persistence."""
 
 import os
-from models.persistence import load_data, save_data
+from datetime import date
+from models.dates import to_ordinal
+from models.persistence import (
+    load_data, compare_and_set, delete_record, iter_records, record_keys, update_record,
+)
 from models.hotel import Hotel
+from models.stats import add_booking, add_cancellation, recompute, same_counters
+import models.customer as customer_module
+import models.hotel as hotel_module
 
 DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'reservations.json')
 
 
+def _is_ordinal(value):
+    """Return True if value is a stored day ordinal (an int, not a bool)."""
+    return (isinstance(value, int) and not isinstance(value, bool)
+            and 1 <= value <= date.max.toordinal())
+
+
 class DateRange:
-    """Represents a check-in and check-out date pair."""
+    """Represents a check-in and check-out date pair.
+
+    Dates are parsed and validated once and kept as day ordinals, so
+    nights(), overlaps() and contains() are plain integer comparisons.
+    Raises ValueError for unparsable dates or when check-out is not after
+    check-in.
+    """
+
+    __slots__ = ('start', 'end')
 
     def __init__(self, check_in, check_out):
-        self.check_in = str(check_in)
-        self.check_out = str(check_out)
+        self.start = to_ordinal(check_in)
+        self.end = to_ordinal(check_out)
+        if self.end <= self.start:
+            raise ValueError(
+                f"Check-out '{check_out}' must be after check-in '{check_in}'."
+            )
+
+    @classmethod
+    def _from_ordinals(cls, start, end):
+        """Build a range from stored day ordinals, validating them."""
+        if not (_is_ordinal(start) and _is_ordinal(end)) or end <= start:
+            raise ValueError(f"Invalid stored dates {[start, end]!r}.")
+        date_range = cls.__new__(cls)
+        date_range.start = start
+        date_range.end = end
+        return date_range
+
+    @property
+    def check_in(self):
+        """Return the check-in date as an ISO string."""
+        return date.fromordinal(self.start).isoformat()
+
+    @property
+    def check_out(self):
+        """Return the check-out date as an ISO string."""
+        return date.fromordinal(self.end).isoformat()
 
     def __repr__(self):
         """Return a readable string representation of the date range."""
         return f"DateRange(check_in={self.check_in}, check_out={self.check_out})"
 
+    def __eq__(self, other):
+        """Compare two ranges by their day ordinals."""
+        if not isinstance(other, DateRange):
+            return NotImplemented
+        return (self.start, self.end) == (other.start, other.end)
+
+    def __hash__(self):
+        """Hash the range by its day ordinals."""
+        return hash((self.start, self.end))
+
     def to_tuple(self):
         """Return check-in and check-out as a tuple."""
         return (self.check_in, self.check_out)
 
+    def to_ordinals(self):
+        """Return the [check-in, check-out] day ordinal pair."""
+        return [self.start, self.end]
+
+    def nights(self):
+        """Return the number of nights in the stay."""
+        return self.end - self.start
+
+    def overlaps(self, other):
+        """Return True if both stays share at least one night."""
+        return self.start < other.end and other.start < self.end
+
+    def contains(self, day):
+        """Return True if the guest is staying on the night of day."""
+        return self.start <= to_ordinal(day) < self.end
+
+    @classmethod
+    def from_record(cls, data):
+        """Build a range from a stored record's ISO strings.
+
+        Records written by earlier versions may hold a 'dates' pair of day
+        ordinals instead. Raw ordinals are accepted only here; the
+        constructor takes ISO strings or dates.
+        """
+        if 'dates' in data:
+            dates = data['dates']
+            if not isinstance(dates, list) or len(dates) != 2:
+                raise ValueError(f"Invalid stored dates {dates!r}.")
+            return cls._from_ordinals(*dates)
+        return cls(data['check_in'], data['check_out'])
+
+
+def stored_date_range(data):
+    """Return the DateRange of a stored reservation, or None if unreadable.
+
+    Legacy records may hold free-form dates such as 'June 1'; a warning is
+    printed so that cancellations and statistics can still proceed.
+    """
+    try:
+        return DateRange.from_record(data)
+    except (KeyError, ValueError) as error:
+        print(f"[WARN] Reservation '{data.get('reservation_id')}' "
+              f"has unreadable dates: {error}")
+        return None
+
 
 class Reservation:
     """Links a Customer to a Hotel for a date range."""
@@ -30,9 +130,19 @@ class Reservation:
         self.reservation_id = str(reservation_id)
         self.customer_id = str(customer_id)
         self.hotel_id = str(hotel_id)
-        self.check_in = date_range.check_in
-        self.check_out = date_range.check_out
+        self.date_range = date_range
         self.status = 'active'
+        self.version = 0
+
+    @property
+    def check_in(self):
+        """Return the check-in date as an ISO string."""
+        return self.date_range.check_in
+
+    @property
+    def check_out(self):
+        """Return the check-out date as an ISO string."""
+        return self.date_range.check_out
 
     def to_dict(self):
         """Serialize reservation to dictionary."""
@@ -43,12 +153,17 @@ class Reservation:
             'check_in': self.check_in,
             'check_out': self.check_out,
             'status': self.status,
+            'version': self.version,
         }
 
     @classmethod
     def from_dict(cls, data):
-        """Deserialize reservation from dictionary."""
-        date_range = DateRange(data['check_in'], data['check_out'])
+        """Deserialize reservation from dictionary.
+
+        Accepts the 'check_in'/'check_out' strings and the 'dates'
+        ordinals written by earlier versions.
+        """
+        date_range = DateRange.from_record(data)
         res = cls(
             data['reservation_id'],
             data['customer_id'],
@@ -56,41 +171,150 @@ class Reservation:
             date_range,
         )
         res.status = data.get('status', 'active')
+        res.version = data.get('version', 0)
         return res
 
     @staticmethod
     def create(reservation_id, customer_id, hotel_id, check_in, check_out):
-        """Create a reservation and update hotel room availability."""
-        reservations = load_data(DATA_FILE)
+        """Create a reservation and update hotel room availability.
+
+        The reservation ID, customer and hotel are checked against cached key
+        indexes, so referential checks do not re-parse the data files.
+        """
         reservation_id = str(reservation_id)
-        if reservation_id in reservations:
-            print(f"[ERROR] Reservation '{reservation_id}' already exists.")
+        customer_id = str(customer_id)
+        hotel_id = str(hotel_id)
+        if not Reservation._check_references(reservation_id, customer_id, hotel_id):
+            return None
+
+        try:
+            date_range = DateRange(check_in, check_out)
+        except ValueError as error:
+            print(f"[ERROR] Invalid dates for reservation '{reservation_id}': {error}")
             return None
 
         if not Hotel.reserve_room(hotel_id, reservation_id):
             return None
 
-        date_range = DateRange(check_in, check_out)
         res = Reservation(reservation_id, customer_id, hotel_id, date_range)
-        reservations[reservation_id] = res.to_dict()
-        save_data(DATA_FILE, reservations)
+        record = res.to_dict()
+        if not compare_and_set(DATA_FILE, reservation_id, None, record):
+            print(f"[ERROR] Reservation '{reservation_id}' already exists.")
+            Hotel.cancel_room(hotel_id, reservation_id)
+            return None
+        res.version = record['version']
+        Hotel.update_stats(hotel_id, lambda stats: add_booking(stats, date_range))
         return res
 
+    @staticmethod
+    def _check_references(reservation_id, customer_id, hotel_id):
+        """Return True if the ID is free and the customer and hotel exist.
+
+        Uses the cached key indexes; a customer or hotel that looks missing
+        is rechecked against a fresh load before the booking is rejected,
+        and so is a reservation ID that looks taken.
+        """
+        if reservation_id in record_keys(DATA_FILE) and reservation_id in load_data(DATA_FILE):
+            print(f"[ERROR] Reservation '{reservation_id}' already exists.")
+            return False
+        for label, path, key in (('Customer', customer_module.DATA_FILE, customer_id),
+                                 ('Hotel', hotel_module.DATA_FILE, hotel_id)):
+            if key not in record_keys(path) and key not in load_data(path):
+                print(f"[ERROR] {label} '{key}' not found.")
+                return False
+        return True
+
     @staticmethod
     def cancel(reservation_id):
         """Cancel a reservation and restore hotel room availability."""
-        reservations = load_data(DATA_FILE)
         reservation_id = str(reservation_id)
-        if reservation_id not in reservations:
-            print(f"[ERROR] Reservation '{reservation_id}' not found.")
-            return False
 
-        data = reservations[reservation_id]
-        if data['status'] == 'cancelled':
-            print(f"[ERROR] Reservation '{reservation_id}' already cancelled.")
-            return False
+        def apply(record):
+            if record is None:
+                print(f"[ERROR] Reservation '{reservation_id}' not found.")
+                return None
+            if record['status'] == 'cancelled':
+                print(f"[ERROR] Reservation '{reservation_id}' already cancelled.")
+                return None
+            record['status'] = 'cancelled'
+            return record
 
-        Hotel.cancel_room(data['hotel_id'], reservation_id)
-        reservations[reservation_id]['status'] = 'cancelled'
-        save_data(DATA_FILE, reservations)
+        record = update_record(DATA_FILE, reservation_id, apply)
+        if record is None:
+            return False
+        Hotel.cancel_room(record['hotel_id'], reservation_id)
+        date_range = stored_date_range(record)
+        Hotel.update_stats(
+            record['hotel_id'], lambda stats: add_cancellation(stats, date_range))
         return True
+
+    @staticmethod
+    def verify_stats(repair=False):
+        """Recompute hotel statistics from scratch and report drift.
+
+        Returns a dict mapping each drifted hotel_id to a (stored, expected)
+        pair, where either side is None if the record is missing. With
+        repair=True the stored records are replaced by the recomputed ones.
+        """
+        stats_path = hotel_module.stats_file()
+        expected = recompute(
+            load_data(hotel_module.DATA_FILE), load_data(DATA_FILE), stored_date_range)
+        stored = load_data(stats_path)
+        drift = {}
+        for hotel_id in set(stored) | set(expected):
+            pair = (stored.get(hotel_id), expected.get(hotel_id))
+            if None in pair or not same_counters(*pair):
+                drift[hotel_id] = pair
+
+        for hotel_id, (_, fresh) in drift.items():
+            print(f"[WARN] Statistics for hotel '{hotel_id}' have drifted.")
+            if not repair:
+                continue
+            if fresh is None:
+                delete_record(stats_path, hotel_id)
+            else:
+                update_record(stats_path, hotel_id, lambda _, fresh=fresh: fresh)
+        return drift
+
+    @staticmethod
+    def check_integrity():
+        """Scan all reservations once and report broken references.
+
+        Each reservation is checked against the customer and hotel key sets
+        and against its hotel's reservation list; hotels that still list a
+        missing or cancelled reservation are reported too. Returns the list
+        of problems found, each also printed as a warning.
+
+        Records are walked once through the in-process view rather than
+        copied with load_data. The base files are single JSON documents,
+        which the standard library cannot parse incrementally, so the view
+        parses each one once and then only tails its change log.
+        """
+        customers = record_keys(customer_module.DATA_FILE)
+        hotels = record_keys(hotel_module.DATA_FILE)
+        listed = {
+            (hotel_id, reservation_id)
+            for hotel_id, hotel in iter_records(hotel_module.DATA_FILE)
+            for reservation_id in hotel.get('reservations', [])
+        }
+        problems = []
+        for reservation_id, data in iter_records(DATA_FILE):
+            hotel_id = data['hotel_id']
+            active = data.get('status', 'active') != 'cancelled'
+            if data['customer_id'] not in customers:
+                problems.append(f"Reservation '{reservation_id}' references missing "
+                                f"customer '{data['customer_id']}'.")
+            if hotel_id not in hotels:
+                problems.append(f"Reservation '{reservation_id}' references missing "
+                                f"hotel '{hotel_id}'.")
+            elif active and (hotel_id, reservation_id) not in listed:
+                problems.append(f"Active reservation '{reservation_id}' is not listed "
+                                f"in hotel '{hotel_id}'.")
+            if active:
+                listed.discard((hotel_id, reservation_id))
+        for hotel_id, reservation_id in sorted(listed):
+            problems.append(f"Hotel '{hotel_id}' lists unknown or cancelled "
+                            f"reservation '{reservation_id}'.")
+        for problem in problems:
+            print(f"[WARN] {problem}")
+        return problems
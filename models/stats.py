@@ -0,0 +1,107 @@
+"""Incrementally maintained per-hotel reservation statistics.
+
+Each hotel has one stats record holding running counters, so dashboards
+read a single small record instead of scanning every reservation. The
+sorted lists of active check-in and check-out days are bounded by the
+hotel's room count, because every active reservation holds a room.
+Reservations whose stored dates cannot be read are counted, but add
+nothing to the date-based figures.
+"""
+
+from bisect import bisect_right, insort
+from datetime import date
+
+from models.dates import to_ordinal
+
+
+def empty_stats(total_rooms):
+    """Return the stats record of a hotel with no reservations."""
+    return {
+        'total_rooms': total_rooms,
+        'active': 0,
+        'cancelled': 0,
+        'active_nights': 0,
+        'check_ins': [],
+        'check_outs': [],
+    }
+
+
+def is_current(record):
+    """Return True if record exists and has every field of empty_stats()."""
+    return record is not None and empty_stats(0).keys() <= record.keys()
+
+
+def add_booking(record, date_range):
+    """Count a new active reservation; returns the updated record.
+
+    date_range may be None when the reservation's dates are unreadable.
+    """
+    record['active'] += 1
+    if date_range is not None:
+        record['active_nights'] += date_range.nights()
+        insort(record['check_ins'], date_range.start)
+        insort(record['check_outs'], date_range.end)
+    return record
+
+
+def add_cancellation(record, date_range):
+    """Move one active reservation to cancelled; returns the updated record.
+
+    date_range may be None when the reservation's dates are unreadable.
+    """
+    record['active'] -= 1
+    record['cancelled'] += 1
+    if date_range is not None and date_range.start in record['check_ins']:
+        record['active_nights'] -= date_range.nights()
+        record['check_ins'].remove(date_range.start)
+        if date_range.end in record['check_outs']:
+            record['check_outs'].remove(date_range.end)
+    return record
+
+
+def summarize(record, today=None):
+    """Return dashboard figures for a stats record.
+
+    Upcoming reservations are active ones that check in after today.
+    Occupancy is the fraction of rooms occupied on the night of today:
+    stays that checked in on or before today and check out after it.
+    today is a date or a YYYY-MM-DD string (ValueError otherwise).
+    """
+    today = to_ordinal(today or date.today())
+    check_ins = record['check_ins']
+    arrived = bisect_right(check_ins, today)
+    occupied = arrived - bisect_right(record['check_outs'], today)
+    total_rooms = int(record['total_rooms'])
+    return {
+        'active': record['active'],
+        'cancelled': record['cancelled'],
+        'upcoming': len(check_ins) - arrived,
+        'occupancy': occupied / total_rooms if total_rooms else 0.0,
+        'average_stay': record['active_nights'] / len(check_ins) if check_ins else 0.0,
+    }
+
+
+def recompute(hotels, reservations, date_range_of):
+    """Rebuild every hotel's stats record from scratch.
+
+    date_range_of converts a stored reservation record to a DateRange, or
+    to None if its dates cannot be read. Reservations of hotels that no longer exist are ignored.
+    """
+    result = {
+        hotel_id: empty_stats(hotel['total_rooms'])
+        for hotel_id, hotel in hotels.items()
+    }
+    for data in reservations.values():
+        record = result.get(data['hotel_id'])
+        if record is None:
+            continue
+        if data.get('status', 'active') == 'cancelled':
+            record['cancelled'] += 1
+        else:
+            add_booking(record, date_range_of(data))
+    return result
+
+
+def same_counters(stored, expected):
+    """Return True if a stored record matches a recomputed one."""
+    return all(stored.get(key) == value for key, value in expected.items())
@@ -0,0 +1,61 @@
+"""Dirty-field tracking shared by the persisted models."""
+
+from abc import ABC, abstractmethod
+
+from models.persistence import update_fields
+
+
+class TrackedRecord(ABC):
+    """Mixin that remembers which persisted attributes were assigned.
+
+    Subclasses list their persisted attributes in TRACKED_FIELDS and
+    implement from_dict. Only assignments are tracked; in-place changes
+    such as list.append are not.
+    """
+
+    TRACKED_FIELDS = ()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.TRACKED_FIELDS:
+            self.__dict__.setdefault('_dirty', set()).add(name)
+
+    def dirty_fields(self):
+        """Return the assigned fields and their values since the last mark_clean."""
+        return {name: getattr(self, name) for name in sorted(self.__dict__.get('_dirty', ()))}
+
+    def mark_clean(self):
+        """Forget all tracked assignments, e.g. right after loading."""
+        self.__dict__['_dirty'] = set()
+
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, data):
+        """Build a clean instance from a stored record."""
+
+    @classmethod
+    def modify_stored(cls, filepath, key, allowed, kwargs):
+        """Assign kwargs to one stored record and log only the changed fields.
+
+        Fields outside allowed are skipped with a warning. Returns the
+        accepted changes, or None if the record does not exist.
+        """
+        changes = {}
+        for name, value in kwargs.items():
+            if name in allowed:
+                changes[name] = value
+            else:
+                print(f"[WARN] Field '{name}' is not modifiable or unknown.")
+
+        def apply(record):
+            if record is None:
+                print(f"[ERROR] {cls.__name__} '{key}' not found.")
+                return None
+            instance = cls.from_dict(record)
+            for name, value in changes.items():
+                setattr(instance, name, value)
+            return instance.dirty_fields()
+
+        if update_fields(filepath, key, apply) is None:
+            return None
+        return changes
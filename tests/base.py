@@ -4,23 +4,36 @@ import os
 import unittest
 from unittest.mock import patch
 
+from models.persistence import delta_file
+
+
+def remove_data_files(*paths):
+    """Delete data files together with their change logs, if present."""
+    for path in paths:
+        for candidate in (path, delta_file(path)):
+            if os.path.exists(candidate):
+                os.remove(candidate)
+
 
 class BaseTempFileTest(unittest.TestCase):
     """Base class that patches a DATA_FILE to a temp path for each test."""
 
     module = None
     temp_file = None
+    extra_files = ()
 
     def setUp(self):
         """Patch DATA_FILE to a temp file and print test description."""
         print(f"\n▶  {self._testMethodName}: {self._testMethodDoc}")
         self.patcher = patch.object(self.module, 'DATA_FILE', self.temp_file)
         self.patcher.start()
-        if os.path.exists(self.temp_file):
-            os.remove(self.temp_file)
+        self._remove_temp_files()
 
     def tearDown(self):
         """Stop patcher and remove temp file after each test."""
         self.patcher.stop()
-        if os.path.exists(self.temp_file):
-            os.remove(self.temp_file)
+        self._remove_temp_files()
+
+    def _remove_temp_files(self):
+        """Delete the temp data file and any extra files the models derive from it."""
+        remove_data_files(self.temp_file, *self.extra_files)
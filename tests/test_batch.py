@@ -0,0 +1,172 @@
+"""Unit tests for the batch command-stream runner."""
+
+import io
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+import batch
+import models.customer as customer_module
+import models.hotel as hotel_module
+import models.reservation as reservation_module
+from models.hotel import Hotel
+from models.persistence import load_data
+from tests.base import remove_data_files
+
+HOTEL_FILE = '/tmp/test_batch_hotels.json'
+CUSTOMER_FILE = '/tmp/test_batch_customers.json'
+RES_FILE = '/tmp/test_batch_reservations.json'
+STATS_FILE = '/tmp/test_batch_hotels_stats.json'
+TEMP_FILES = (HOTEL_FILE, CUSTOMER_FILE, RES_FILE, STATS_FILE)
+
+
+def _op(op_name, /, *args, **kwargs):
+    """Return one JSONL operation line."""
+    return json.dumps({'op': op_name, 'args': kwargs or list(args)}) + '\n'
+
+
+class TestBatchRunner(unittest.TestCase):
+    """Tests for running JSONL operation streams in one process."""
+
+    def setUp(self):
+        """Print test description and patch all data files to temp paths."""
+        print(f"\n▶  {self._testMethodName}: {self._testMethodDoc}")
+        self.patchers = [
+            patch.object(hotel_module, 'DATA_FILE', HOTEL_FILE),
+            patch.object(customer_module, 'DATA_FILE', CUSTOMER_FILE),
+            patch.object(reservation_module, 'DATA_FILE', RES_FILE),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self._remove_files()
+
+    def tearDown(self):
+        """Stop patchers and remove temp files after each test."""
+        for patcher in self.patchers:
+            patcher.stop()
+        self._remove_files()
+
+    @staticmethod
+    def _remove_files():
+        """Delete every temp data file used by the runner."""
+        remove_data_files(*TEMP_FILES)
+
+    def _run(self, lines, checkpoint_every=batch.DEFAULT_CHECKPOINT_EVERY):
+        """Run lines and return (result records, summary)."""
+        out = io.StringIO()
+        summary = batch.run(lines, out, checkpoint_every)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(records[-1], {'summary': summary})
+        return records[:-1], summary
+
+    def test_runs_operations_and_persists_at_end(self):
+        """Should execute a booking sequence and write all files when done."""
+        results, summary = self._run([
+            _op('hotel.create', 'H1', 'Inn', 'NYC', 3),
+            _op('customer.create', 'C1', 'Alice', 'a@x.com', '555'),
+            _op('customer.modify', customer_id='C1', phone='999'),
+            _op('reservation.create', 'R1', 'C1', 'H1', '2025-01-01', '2025-01-03'),
+            '\n',
+            _op('reservation.cancel', 'R1'),
+        ])
+        self.assertEqual([r['ok'] for r in results], [True] * 5)
+        self.assertEqual(results[3]['result']['reservation_id'], 'R1')
+        self.assertEqual(summary['ops'], 5)
+        self.assertEqual(summary['failed'], 0)
+        self.assertGreater(summary['ops_per_sec'], 0)
+        self.assertEqual(load_data(CUSTOMER_FILE)['C1']['phone'], '999')
+        self.assertEqual(load_data(RES_FILE)['R1']['status'], 'cancelled')
+        self.assertEqual(load_data(HOTEL_FILE)['H1']['available_rooms'], 3)
+
+    def test_failures_become_structured_results(self):
+        """Should report model errors, bad lines and bad arguments without stopping."""
+        crash = RuntimeError('stats store offline')
+        with patch.object(Hotel, 'stats', side_effect=crash):
+            results, summary = self._run([
+                _op('reservation.create', 'R1', 'GHOST', 'H1', '2025-01-01', '2025-01-03'),
+                _op('hotel.teleport'),
+                'not json\n',
+                _op('hotel.create', bad=1),
+                _op('hotel.create', 'H1', 'Inn', 'NYC', 3),
+                _op('hotel.stats', 'H1'),
+                _op('hotel.reserve_room', 'H1', 'R9'),
+                _op('hotel.display', 'H1'),
+            ])
+        self.assertEqual([r['ok'] for r in results],
+                         [False, False, False, False, True, False, False, True])
+        self.assertEqual(results[0]['messages'], ["[ERROR] Customer 'GHOST' not found."])
+        self.assertIn('error', results[1])
+        self.assertIn('error', results[2])
+        self.assertIn('bad', results[3]['error'])
+        self.assertEqual(results[5]['error'], 'RuntimeError: stats store offline')
+        self.assertIn('Unknown', results[6]['error'])
+        self.assertEqual(summary['failed'], 6)
+
+    def test_stats_with_iso_today(self):
+        """Should return real statistics when today is given as a JSON string."""
+        results, _ = self._run([
+            _op('hotel.create', 'H1', 'Inn', 'NYC', 4),
+            _op('customer.create', 'C1', 'Ann', 'ann@x.com', '555'),
+            _op('reservation.create', 'R1', 'C1', 'H1', '2025-01-01', '2025-01-04'),
+            _op('hotel.stats', hotel_id='H1', today='2025-01-02'),
+        ])
+        self.assertEqual(results[-1]['result'], {
+            'active': 1, 'cancelled': 0, 'upcoming': 0,
+            'occupancy': 0.25, 'average_stay': 3.0,
+        })
+
+    def test_writes_only_at_checkpoints(self):
+        """Should keep changes in memory until a checkpoint is reached."""
+        on_disk = []
+
+        def lines():
+            yield _op('hotel.create', 'H1', 'Inn', 'NYC', 3)
+            on_disk.append(os.path.exists(HOTEL_FILE))
+            yield _op('hotel.create', 'H2', 'Inn', 'LA', 3)
+            on_disk.append(os.path.exists(HOTEL_FILE))
+            yield _op('hotel.modify', hotel_id='H1', name='Lodge')
+            with open(HOTEL_FILE, 'r', encoding='utf-8') as file:
+                on_disk.append(json.load(file)['H1']['name'])
+
+        _, summary = self._run(lines(), checkpoint_every=2)
+        self.assertEqual(on_disk, [False, True, 'Inn'])
+        self.assertEqual(summary['checkpoints'], 2)
+
+    def test_main_reads_file(self):
+        """Should read operations from a file and return a failing exit code on errors."""
+        source = '/tmp/test_batch_ops.jsonl'
+        with open(source, 'w', encoding='utf-8') as file:
+            file.write(_op('hotel.create', 'H1', 'Inn', 'NYC', 3))
+            file.write(_op('hotel.delete', 'GHOST'))
+        try:
+            with patch('sys.stdout', new_callable=io.StringIO) as out:
+                code = batch.main([source])
+        finally:
+            os.remove(source)
+        self.assertEqual(code, 1)
+        self.assertIn('"summary"', out.getvalue())
+
+    def test_failed_writes_are_reported(self):
+        """Should keep stdout valid JSONL and exit non-zero when a checkpoint fails."""
+        source = '/tmp/test_batch_ops.jsonl'
+        with open(source, 'w', encoding='utf-8') as file:
+            file.write(_op('hotel.create', 'H1', 'Inn', 'NYC', 3))
+        try:
+            with patch('sys.stdout', new_callable=io.StringIO) as out, \
+                    patch('os.replace', side_effect=OSError('disk full')):
+                code = batch.main([source])
+        finally:
+            os.remove(source)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        summary = records[-1]['summary']
+        self.assertEqual(code, 1)
+        self.assertEqual(summary['failed'], 0)
+        self.assertEqual(summary['checkpoints'], 0)
+        self.assertGreater(summary['write_errors'], 0)
+        self.assertIn('disk full', summary['messages'][0])
+        self.assertFalse(os.path.exists(HOTEL_FILE))
+
+
+if __name__ == '__main__':
+    unittest.main()
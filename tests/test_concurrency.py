@@ -0,0 +1,126 @@
+"""Stress tests for concurrent model operations on shared data files."""
+
+import multiprocessing
+import threading
+import unittest
+from unittest.mock import patch
+
+import models.hotel as hotel_module
+from models.hotel import Hotel
+from models.persistence import load_data
+from tests.base import remove_data_files
+
+HOTEL_FILE = '/tmp/test_stress_hotels.json'
+HOTEL_STATS_FILE = '/tmp/test_stress_hotels_stats.json'
+WORKERS = 8
+OPS_PER_WORKER = 15
+
+
+def _book_rooms(hotel_ids, prefix):
+    """Reserve one room per hotel in hotel_ids, OPS_PER_WORKER times (process entry point)."""
+    with patch.object(hotel_module, 'DATA_FILE', HOTEL_FILE):
+        for op in range(OPS_PER_WORKER):
+            for hotel_id in hotel_ids:
+                Hotel.reserve_room(hotel_id, f'{prefix}-{hotel_id}-{op}')
+
+
+def _run_workers(target):
+    """Run target(worker_index) on WORKERS threads and wait for all of them."""
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestConcurrentUpdates(unittest.TestCase):
+    """Concurrent workers must never lose or duplicate an update."""
+
+    def setUp(self):
+        """Print test description and remove leftover temp files."""
+        print(f"\n▶  {self._testMethodName}: {self._testMethodDoc}")
+        self.patcher = patch.object(hotel_module, 'DATA_FILE', HOTEL_FILE)
+        self.patcher.start()
+        remove_data_files(HOTEL_FILE, HOTEL_STATS_FILE)
+
+    def tearDown(self):
+        """Stop patcher and remove temp files after each test."""
+        self.patcher.stop()
+        remove_data_files(HOTEL_FILE, HOTEL_STATS_FILE)
+
+    def test_independent_hotels_lose_no_updates(self):
+        """Should apply every reservation when workers book different hotels."""
+        for i in range(WORKERS):
+            Hotel.create(f'H{i}', f'Inn {i}', 'NYC', OPS_PER_WORKER)
+        failures = []
+
+        def worker(index):
+            for op in range(OPS_PER_WORKER):
+                if not Hotel.reserve_room(f'H{index}', f'R{index}-{op}'):
+                    failures.append((index, op))
+
+        _run_workers(worker)
+        hotels = load_data(HOTEL_FILE)
+        self.assertEqual(failures, [])
+        for i in range(WORKERS):
+            self.assertEqual(hotels[f'H{i}']['available_rooms'], 0)
+            self.assertEqual(len(hotels[f'H{i}']['reservations']), OPS_PER_WORKER)
+
+    def test_concurrent_reservations_never_oversell(self):
+        """Should hand out exactly total_rooms rooms under contention."""
+        Hotel.create('H1', 'Busy Inn', 'NYC', 20)
+        granted = []
+
+        def worker(index):
+            for op in range(5):
+                if Hotel.reserve_room('H1', f'R{index}-{op}'):
+                    granted.append(f'R{index}-{op}')
+
+        _run_workers(worker)
+        record = load_data(HOTEL_FILE)['H1']
+        self.assertEqual(len(granted), 20)
+        self.assertEqual(record['available_rooms'], 0)
+        self.assertEqual(sorted(record['reservations']), sorted(granted))
+
+    def test_modify_and_reserve_same_hotel(self):
+        """Should keep both field edits and room bookings made at the same time."""
+        Hotel.create('H1', 'Busy Inn', 'NYC', WORKERS * OPS_PER_WORKER)
+
+        def worker(index):
+            for op in range(OPS_PER_WORKER):
+                if index % 2:
+                    Hotel.modify('H1', location=f'City {index}-{op}')
+                else:
+                    Hotel.reserve_room('H1', f'R{index}-{op}')
+
+        _run_workers(worker)
+        record = load_data(HOTEL_FILE)['H1']
+        booked = (WORKERS // 2) * OPS_PER_WORKER
+        self.assertEqual(len(record['reservations']), booked)
+        self.assertEqual(record['available_rooms'], WORKERS * OPS_PER_WORKER - booked)
+        self.assertEqual(record['version'], 1 + WORKERS * OPS_PER_WORKER)
+
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(),
+                         'requires the fork start method')
+    def test_processes_lose_no_updates(self):
+        """Should apply every booking from several processes, across log folds."""
+        for hotel_id in ('A', 'B'):
+            Hotel.create(hotel_id, 'Shared Inn', 'NYC', 100)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=_book_rooms, args=(['A', 'B'], f'P{i}'))
+            for i in range(4)
+        ]
+        with patch('models.persistence.DELTA_FOLD_BYTES', 2048):
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        hotels = load_data(HOTEL_FILE)
+        for hotel_id in ('A', 'B'):
+            self.assertEqual(len(hotels[hotel_id]['reservations']), 4 * OPS_PER_WORKER)
+            self.assertEqual(hotels[hotel_id]['available_rooms'], 100 - 4 * OPS_PER_WORKER)
+
+
+if __name__ == '__main__':
+    unittest.main()
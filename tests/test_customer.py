@@ -55,6 +55,7 @@ class TestCustomerCRUD(BaseTempFileTest):
         Customer.create('C4', 'Dave', 'dave@x.com', '555-1111')
         result = Customer.modify('C4', email='new@x.com')
         self.assertTrue(result)
+        self.assertEqual(Customer.display('C4').email, 'new@x.com')
 
     def test_modify_customer_not_found(self):
         """Should return False and print error when customer ID does not exist."""
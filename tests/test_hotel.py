@@ -1,16 +1,24 @@
 """Unit tests for the Hotel class and shared persistence helpers."""
 
+import json
 import os
 import unittest
 from unittest.mock import patch, mock_open
 
 import models.hotel as hotel_module
+from models import persistence
 from models.hotel import Hotel
-from models.persistence import load_data, save_data
-from tests.base import BaseTempFileTest
+from models.persistence import (
+    load_data, save_data, compare_and_set, delete_record, record_keys, update_record,
+    append_changes, delta_file, fold_changes,
+)
+from tests.base import BaseTempFileTest, remove_data_files
 
 TEMP_FILE = '/tmp/test_hotels.json'
 TEMP_ROOMS_FILE = '/tmp/test_hotels_rooms.json'
+TEMP_STATS_FILE = '/tmp/test_hotels_stats.json'
+TEMP_ROOMS_STATS_FILE = '/tmp/test_hotels_rooms_stats.json'
+TEMP_CAS_FILE = '/tmp/test_cas.json'
 
 
 class TestPersistence(unittest.TestCase):
@@ -39,11 +47,151 @@ class TestPersistence(unittest.TestCase):
             save_data('/fake/path.json', {'h1': {}})
 
 
+class TestCompareAndSet(unittest.TestCase):
+    """Tests for versioned compare-and-set record updates."""
+
+    def setUp(self):
+        """Print test description and start from an empty file."""
+        print(f"\n▶  {self._testMethodName}: {self._testMethodDoc}")
+        self.tearDown()
+
+    def tearDown(self):
+        """Remove the temp files after each test."""
+        remove_data_files(TEMP_CAS_FILE)
+
+    def test_insert_sets_version_one(self):
+        """Should insert a missing key and stamp it with version 1."""
+        self.assertTrue(compare_and_set(TEMP_CAS_FILE, 'k', None, {'n': 0}))
+        self.assertEqual(load_data(TEMP_CAS_FILE)['k']['version'], 1)
+
+    def test_insert_existing_key_fails(self):
+        """Should refuse an insert when the key already exists."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'n': 0})
+        self.assertFalse(compare_and_set(TEMP_CAS_FILE, 'k', None, {'n': 1}))
+
+    def test_stale_version_conflicts(self):
+        """Should reject a write based on an outdated version."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'n': 0})
+        self.assertTrue(compare_and_set(TEMP_CAS_FILE, 'k', 1, {'n': 1}))
+        self.assertFalse(compare_and_set(TEMP_CAS_FILE, 'k', 1, {'n': 2}))
+        self.assertEqual(load_data(TEMP_CAS_FILE)['k']['n'], 1)
+
+    def test_update_record_retries_after_conflict(self):
+        """Should re-read and re-apply the mutation when another writer wins."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'n': 0})
+        calls = []
+
+        def bump(record):
+            if not calls:
+                compare_and_set(TEMP_CAS_FILE, 'k', 1, {'n': 10})
+            calls.append(record['n'])
+            record['n'] += 1
+            return record
+
+        result = update_record(TEMP_CAS_FILE, 'k', bump)
+        self.assertEqual(calls, [0, 10])
+        self.assertEqual(result['n'], 11)
+        self.assertEqual(result['version'], 3)
+
+    def test_record_keys_cached_until_file_changes(self):
+        """Should answer from the cache after a save and reload after an outside rewrite."""
+        save_data(TEMP_CAS_FILE, {'a': {}, 'b': {}})
+        record_keys(TEMP_CAS_FILE)
+        with patch('models.persistence._read_base') as reader:
+            self.assertEqual(record_keys(TEMP_CAS_FILE), {'a', 'b'})
+            reader.assert_not_called()
+        with open(TEMP_CAS_FILE, 'w', encoding='utf-8') as file:
+            file.write('{"c": {}, "d": {}, "e": {}}')
+        self.assertEqual(record_keys(TEMP_CAS_FILE), {'c', 'd', 'e'})
+
+    def test_commits_leave_base_file_untouched(self):
+        """Should append commits to the delta log and merge them on load."""
+        save_data(TEMP_CAS_FILE, {'k': {'a': 1, 'b': 2}})
+        base_before = os.stat(TEMP_CAS_FILE).st_mtime_ns
+        self.assertTrue(compare_and_set(TEMP_CAS_FILE, 'k', 0, {'a': 5, 'b': 2}))
+        self.assertTrue(append_changes(TEMP_CAS_FILE, 'k', 1, {'b': 3}))
+        self.assertTrue(compare_and_set(TEMP_CAS_FILE, 'n', None, {'a': 0}))
+        self.assertEqual(os.stat(TEMP_CAS_FILE).st_mtime_ns, base_before)
+        self.assertEqual(load_data(TEMP_CAS_FILE)['k'], {'a': 5, 'b': 3, 'version': 2})
+        self.assertEqual(set(load_data(TEMP_CAS_FILE)), {'k', 'n'})
+        self.assertFalse(append_changes(TEMP_CAS_FILE, 'k', 1, {'b': 4}))
+
+    def test_fold_changes_merges_delta(self):
+        """Should write pending changes into the base file and drop the delta."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'a': 1})
+        append_changes(TEMP_CAS_FILE, 'k', 1, {'a': 2})
+        fold_changes(TEMP_CAS_FILE)
+        self.assertFalse(os.path.exists(delta_file(TEMP_CAS_FILE)))
+        self.assertEqual(load_data(TEMP_CAS_FILE)['k']['a'], 2)
+
+    def test_delta_folds_past_threshold(self):
+        """Should fold the delta into the base file once it grows too large."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'a': 0})
+        with patch('models.persistence.DELTA_FOLD_BYTES', 100):
+            for version in range(1, 6):
+                append_changes(TEMP_CAS_FILE, 'k', version, {'a': version})
+            delta = delta_file(TEMP_CAS_FILE)
+            self.assertLessEqual(os.path.getsize(delta) if os.path.exists(delta) else 0, 100)
+        with open(TEMP_CAS_FILE, 'r', encoding='utf-8') as file:
+            self.assertGreater(json.load(file)['k']['version'], 1)
+        self.assertEqual(load_data(TEMP_CAS_FILE)['k']['a'], 5)
+
+    def test_stale_delta_entries_are_ignored(self):
+        """Should not let an older logged change override a newer base record."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'a': 1})
+        append_changes(TEMP_CAS_FILE, 'k', 1, {'a': 2})
+        with open(delta_file(TEMP_CAS_FILE), 'r', encoding='utf-8') as file:
+            stale = file.read()
+        compare_and_set(TEMP_CAS_FILE, 'k', 2, {'a': 3})
+        fold_changes(TEMP_CAS_FILE)
+        with open(delta_file(TEMP_CAS_FILE), 'w', encoding='utf-8') as file:
+            file.write(stale + '{"key": "k", "cha')
+        with patch('builtins.print') as mock_print:
+            self.assertEqual(load_data(TEMP_CAS_FILE)['k']['a'], 3)
+        mock_print.assert_not_called()
+
+    def test_load_retries_when_folded_between_reads(self):
+        """Should not apply a new delta to a base file that was replaced meanwhile."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'a': 1})
+        real_read_base = persistence._read_base  # pylint: disable=protected-access
+        calls = []
+
+        def read_base_then_fold(filepath):
+            data = real_read_base(filepath)
+            if not calls:
+                calls.append(filepath)
+                append_changes(TEMP_CAS_FILE, 'k', 1, {'a': 2})
+                fold_changes(TEMP_CAS_FILE)
+                append_changes(TEMP_CAS_FILE, 'k', 2, {'a': 3})
+            return data
+
+        with patch('models.persistence._read_base', side_effect=read_base_then_fold):
+            self.assertEqual(load_data(TEMP_CAS_FILE)['k']['a'], 3)
+
+    def test_stale_delta_skips_recreated_record(self):
+        """Should not apply logged changes of a deleted record to its replacement."""
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'a': 1})
+        for version in range(1, 4):
+            append_changes(TEMP_CAS_FILE, 'k', version, {'a': 10 + version})
+        delete_record(TEMP_CAS_FILE, 'k')
+        with open(delta_file(TEMP_CAS_FILE), 'r', encoding='utf-8') as file:
+            stale = file.read()
+        compare_and_set(TEMP_CAS_FILE, 'k', None, {'a': 100})
+        fold_changes(TEMP_CAS_FILE)
+        with open(delta_file(TEMP_CAS_FILE), 'w', encoding='utf-8') as file:
+            file.write(stale.split('\n', 1)[1])
+        self.assertEqual(load_data(TEMP_CAS_FILE)['k']['a'], 100)
+        self.assertEqual(record_keys(TEMP_CAS_FILE), {'k'})
+        self.assertTrue(append_changes(TEMP_CAS_FILE, 'k', 1, {'a': 101}))
+        self.assertEqual(load_data(TEMP_CAS_FILE)['k']['a'], 101)
+
+
 class TestHotelCRUD(BaseTempFileTest):
     """Tests for Hotel create, delete, display, and modify operations."""
 
     module = hotel_module
     temp_file = TEMP_FILE
+    extra_files = (TEMP_STATS_FILE,)
 
     def test_create_hotel_success(self):
         """Should create a new hotel and persist it with correct attributes."""
@@ -105,6 +253,35 @@ class TestHotelCRUD(BaseTempFileTest):
         self.assertEqual(h.hotel_id, 'H6')
         self.assertEqual(h.total_rooms, 100)
 
+    def test_modify_hotel_bumps_version(self):
+        """Should increment the record version on every successful change."""
+        h = Hotel.create('H7', 'Inn', 'Austin', 10)
+        self.assertEqual(h.version, 1)
+        Hotel.modify('H7', name='Inn 2')
+        self.assertEqual(Hotel.display('H7').version, 2)
+
+    def test_modify_hotel_writes_only_dirty_fields(self):
+        """Should log just the modified field instead of rewriting the file."""
+        Hotel.create('H8', 'Inn', 'Austin', 10)
+        Hotel.modify('H8', location='Dallas')
+        with open(TEMP_FILE + '.delta', 'r', encoding='utf-8') as file:
+            last = json.loads(file.readlines()[-1])
+        self.assertEqual(last, {
+            'op': 'update', 'key': 'H8',
+            'creation_id': load_data(TEMP_FILE)['H8']['creation_id'],
+            'changes': {'location': 'Dallas', 'version': 2},
+        })
+        self.assertEqual(Hotel.display('H8').location, 'Dallas')
+
+    def test_dirty_tracking(self):
+        """Should report only fields assigned after loading."""
+        h = Hotel.from_dict(Hotel('H9', 'Inn', 'Austin', 10).to_dict())
+        self.assertEqual(h.dirty_fields(), {})
+        h.name = 'Lodge'
+        self.assertEqual(h.dirty_fields(), {'name': 'Lodge'})
+        h.mark_clean()
+        self.assertEqual(h.dirty_fields(), {})
+
 
 class TestHotelRoomOperations(unittest.TestCase):
     """Tests for Hotel reserve_room and cancel_room operations."""
@@ -114,15 +291,13 @@ class TestHotelRoomOperations(unittest.TestCase):
         print(f"\n▶  {self._testMethodName}: {self._testMethodDoc}")
         self.patcher = patch.object(hotel_module, 'DATA_FILE', TEMP_ROOMS_FILE)
         self.patcher.start()
-        if os.path.exists(TEMP_ROOMS_FILE):
-            os.remove(TEMP_ROOMS_FILE)
+        remove_data_files(TEMP_ROOMS_FILE, TEMP_ROOMS_STATS_FILE)
         Hotel.create('R1', 'Tiny Hotel', 'Boston', 2)
 
     def tearDown(self):
         """Stop patcher and remove temp file after each test."""
         self.patcher.stop()
-        if os.path.exists(TEMP_ROOMS_FILE):
-            os.remove(TEMP_ROOMS_FILE)
+        remove_data_files(TEMP_ROOMS_FILE, TEMP_ROOMS_STATS_FILE)
 
     def test_reserve_room_success(self):
         """Should reserve a room, decrement availability, and return True."""
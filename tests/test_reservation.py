@@ -1,16 +1,23 @@
 """Unit tests for the Reservation class."""
 
-import os
 import unittest
+from datetime import date
 from unittest.mock import patch
 
 import models.reservation as reservation_module
 import models.hotel as hotel_module
+import models.customer as customer_module
 from models.reservation import Reservation, DateRange
 from models.hotel import Hotel
+from models.customer import Customer
+from models.persistence import compare_and_set, delete_record, load_data
+from tests.base import remove_data_files
 
 HOTEL_FILE = '/tmp/test_res_hotels.json'
 RES_FILE = '/tmp/test_reservations.json'
+STATS_FILE = '/tmp/test_res_hotels_stats.json'
+CUSTOMER_FILE = '/tmp/test_res_customers.json'
+TEMP_FILES = (HOTEL_FILE, RES_FILE, STATS_FILE, CUSTOMER_FILE)
 
 
 class TestDateRange(unittest.TestCase):
@@ -37,29 +44,85 @@ class TestDateRange(unittest.TestCase):
         dr = DateRange('2025-01-01', '2025-01-05')
         self.assertEqual(dr.to_tuple(), ('2025-01-01', '2025-01-05'))
 
+    def test_date_range_rejects_invalid_date(self):
+        """Should raise ValueError when a date is not in YYYY-MM-DD format."""
+        with self.assertRaises(ValueError):
+            DateRange('2025-02-30', '2025-03-02')
 
-class TestReservationCRUD(unittest.TestCase):
-    """Tests for Reservation create and cancel."""
+    def test_date_range_accepts_only_yyyy_mm_dd(self):
+        """Should reject other ISO 8601 spellings on every Python version."""
+        for text in ('20250602', '2025-W24-1', '2025-6-2', '2025-06-02T00:00'):
+            with self.assertRaises(ValueError):
+                DateRange(text, '2025-07-01')
+
+    def test_date_range_rejects_inverted_range(self):
+        """Should raise ValueError when check-out is not after check-in."""
+        with self.assertRaises(ValueError):
+            DateRange('2025-01-05', '2025-01-01')
+        with self.assertRaises(ValueError):
+            DateRange('2025-01-05', '2025-01-05')
+
+    def test_date_range_nights(self):
+        """Should count nights across month and year boundaries."""
+        self.assertEqual(DateRange('2024-12-30', '2025-01-02').nights(), 3)
+
+    def test_date_range_overlaps(self):
+        """Should treat back-to-back stays as non-overlapping."""
+        dr = DateRange('2025-01-01', '2025-01-05')
+        self.assertTrue(dr.overlaps(DateRange('2025-01-04', '2025-01-08')))
+        self.assertFalse(dr.overlaps(DateRange('2025-01-05', '2025-01-08')))
+
+    def test_date_range_contains(self):
+        """Should include the check-in night and exclude the check-out day."""
+        dr = DateRange('2025-01-01', '2025-01-05')
+        self.assertTrue(dr.contains('2025-01-01'))
+        self.assertTrue(dr.contains('2025-01-04'))
+        self.assertFalse(dr.contains('2025-01-05'))
+
+    def test_date_range_from_legacy_record(self):
+        """Should read both ISO string fields and an earlier 'dates' ordinal pair."""
+        legacy = DateRange.from_record({'check_in': '2025-01-01', 'check_out': '2025-01-05'})
+        stored = DateRange.from_record({'dates': legacy.to_ordinals()})
+        self.assertEqual(legacy, stored)
+
+    def test_date_range_rejects_bare_ordinals(self):
+        """Should accept day ordinals only from stored records, never ints or bools."""
+        start = date(2025, 1, 1).toordinal()
+        for bad in ((start, start + 3), (True, '2025-01-05'), ('2025-01-01', 739000)):
+            with self.assertRaises(ValueError):
+                DateRange(*bad)
+        for bad in ([True, start], [start, 'x'], [0, 5], [start], [start, start]):
+            with self.assertRaises(ValueError):
+                DateRange.from_record({'dates': bad})
+
+
+class ReservationFilesTest(unittest.TestCase):
+    """Base class that patches hotel, customer and reservation files to temp paths."""
 
     def setUp(self):
-        """Print test description and set up hotel and reservation temp files."""
+        """Print test description and set up hotel, customer and reservation temp files."""
         print(f"\n▶  {self._testMethodName}: {self._testMethodDoc}")
-        self.h_patch = patch.object(hotel_module, 'DATA_FILE', HOTEL_FILE)
-        self.r_patch = patch.object(reservation_module, 'DATA_FILE', RES_FILE)
-        self.h_patch.start()
-        self.r_patch.start()
-        for f in (HOTEL_FILE, RES_FILE):
-            if os.path.exists(f):
-                os.remove(f)
+        self.patchers = [
+            patch.object(hotel_module, 'DATA_FILE', HOTEL_FILE),
+            patch.object(reservation_module, 'DATA_FILE', RES_FILE),
+            patch.object(customer_module, 'DATA_FILE', CUSTOMER_FILE),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        remove_data_files(*TEMP_FILES)
         Hotel.create('H1', 'Test Hotel', 'NYC', 5)
+        Customer.create('C1', 'Alice', 'alice@x.com', '555-1234')
+        Customer.create('C2', 'Bob', 'bob@x.com', '555-5678')
 
     def tearDown(self):
         """Stop patchers and clean up temp files after each test."""
-        self.h_patch.stop()
-        self.r_patch.stop()
-        for f in (HOTEL_FILE, RES_FILE):
-            if os.path.exists(f):
-                os.remove(f)
+        for patcher in self.patchers:
+            patcher.stop()
+        remove_data_files(*TEMP_FILES)
+
+
+class TestReservationCRUD(ReservationFilesTest):
+    """Tests for Reservation create and cancel."""
 
     def test_create_reservation_success(self):
         """Should create a reservation with active status and return it."""
@@ -67,12 +130,29 @@ class TestReservationCRUD(unittest.TestCase):
         self.assertIsNotNone(r)
         self.assertEqual(r.status, 'active')
 
+    def test_reservation_stored_with_iso_strings(self):
+        """Should persist readable check-in and check-out strings, not ordinals."""
+        r = Reservation.create('R1', 'C1', 'H1', '2025-01-01', '2025-01-05')
+        stored = load_data(RES_FILE)['R1']
+        self.assertEqual((stored['check_in'], stored['check_out']), ('2025-01-01', '2025-01-05'))
+        self.assertNotIn('dates', stored)
+        self.assertEqual(Reservation.from_dict(stored).date_range, r.date_range)
+
     def test_create_reservation_duplicate(self):
         """Should return None and print error when reservation ID already exists."""
         Reservation.create('R1', 'C1', 'H1', '2025-01-01', '2025-01-05')
         r2 = Reservation.create('R1', 'C2', 'H1', '2025-02-01', '2025-02-05')
         self.assertIsNone(r2)
 
+    def test_create_rechecks_stale_key_index(self):
+        """Should recheck a missed key against the file before rejecting the booking."""
+        with patch.object(reservation_module, 'record_keys', return_value=set()):
+            r = Reservation.create('R1', 'C1', 'H1', '2025-01-01', '2025-01-05')
+        self.assertIsNotNone(r)
+        with patch.object(reservation_module, 'record_keys', return_value={'R2', 'C1', 'H1'}):
+            r = Reservation.create('R2', 'C1', 'H1', '2025-01-01', '2025-01-05')
+        self.assertIsNotNone(r)
+
     def test_create_reservation_hotel_not_found(self):
         """Should return None when the referenced hotel does not exist."""
         r = Reservation.create('R2', 'C1', 'GHOST', '2025-01-01', '2025-01-05')
@@ -117,6 +197,173 @@ class TestReservationCRUD(unittest.TestCase):
         r2 = Reservation.from_dict(d)
         self.assertEqual(r2.customer_id, 'C1')
         self.assertEqual(r2.hotel_id, 'H1')
+        self.assertEqual(r2.check_in, '2025-06-01')
+
+    def test_reservation_from_legacy_dict(self):
+        """Should load records written with check_in/check_out strings."""
+        r = Reservation.from_dict({
+            'reservation_id': 'R9', 'customer_id': 'C1', 'hotel_id': 'H1',
+            'check_in': '2025-06-01', 'check_out': '2025-06-03', 'status': 'active',
+        })
+        self.assertEqual(r.date_range.nights(), 2)
+
+    def test_create_reservation_invalid_dates(self):
+        """Should return None and keep the room free when dates are inverted."""
+        r = Reservation.create('R10', 'C1', 'H1', '2025-06-05', '2025-06-01')
+        self.assertIsNone(r)
+        self.assertEqual(Hotel.display('H1').available_rooms, 5)
+
+    def test_create_reservation_customer_not_found(self):
+        """Should return None and keep the room free when the customer does not exist."""
+        r = Reservation.create('R11', 'GHOST', 'H1', '2025-01-01', '2025-01-05')
+        self.assertIsNone(r)
+        self.assertEqual(Hotel.display('H1').available_rooms, 5)
+
+    def test_create_reservation_sees_deleted_customer(self):
+        """Should reject a customer deleted after the key index was cached."""
+        Reservation.create('R12', 'C1', 'H1', '2025-01-01', '2025-01-05')
+        Customer.delete('C2')
+        self.assertIsNone(Reservation.create('R13', 'C2', 'H1', '2025-01-01', '2025-01-05'))
+
+
+class TestIntegrityScan(ReservationFilesTest):
+    """Tests for the offline referential integrity scanner."""
+
+    def test_integrity_clean(self):
+        """Should report no problems for consistent data."""
+        Reservation.create('R1', 'C1', 'H1', '2025-01-01', '2025-01-05')
+        Reservation.create('R2', 'C2', 'H1', '2025-01-01', '2025-01-05')
+        Reservation.cancel('R2')
+        with patch.object(reservation_module, 'load_data') as loader:
+            self.assertEqual(Reservation.check_integrity(), [])
+        loader.assert_not_called()
+
+    def test_integrity_dangling_customer(self):
+        """Should report reservations whose customer was deleted."""
+        Reservation.create('R1', 'C1', 'H1', '2025-01-01', '2025-01-05')
+        Customer.delete('C1')
+        problems = Reservation.check_integrity()
+        self.assertEqual(len(problems), 1)
+        self.assertIn("customer 'C1'", problems[0])
+
+    def test_integrity_hotel_list_mismatch(self):
+        """Should report reservations missing from or stale in the hotel list."""
+        Reservation.create('R1', 'C1', 'H1', '2025-01-01', '2025-01-05')
+        Hotel.cancel_room('H1', 'R1')
+        Hotel.reserve_room('H1', 'GHOST_RES')
+        problems = Reservation.check_integrity()
+        self.assertEqual(len(problems), 2)
+
+
+class TestHotelStats(ReservationFilesTest):
+    """Tests for incrementally maintained per-hotel statistics."""
+
+    TODAY = date(2025, 3, 1)
+
+    def test_stats_new_hotel(self):
+        """Should report zero counts for a hotel without reservations."""
+        stats = Hotel.stats('H1', today=self.TODAY)
+        self.assertEqual(stats['active'], 0)
+        self.assertEqual(stats['occupancy'], 0.0)
+        self.assertEqual(stats['average_stay'], 0.0)
+
+    def test_stats_track_create_and_cancel(self):
+        """Should update counts, upcoming, occupancy and average stay incrementally."""
+        Reservation.create('R1', 'C1', 'H1', '2025-02-01', '2025-02-03')
+        Reservation.create('R2', 'C1', 'H1', '2025-04-01', '2025-04-05')
+        Reservation.create('R3', 'C1', 'H1', '2025-05-01', '2025-05-07')
+        Reservation.create('R4', 'C2', 'H1', '2025-02-28', '2025-03-02')
+        Reservation.cancel('R3')
+        stats = Hotel.stats('H1', today=self.TODAY)
+        self.assertEqual(stats['active'], 3)
+        self.assertEqual(stats['cancelled'], 1)
+        self.assertEqual(stats['upcoming'], 1)
+        self.assertAlmostEqual(stats['occupancy'], 1 / 5)
+        self.assertAlmostEqual(stats['average_stay'], 8 / 3)
+
+    def test_occupancy_counts_rooms_occupied_today(self):
+        """Should count only stays that include the night of today."""
+        Reservation.create('R1', 'C1', 'H1', '2025-03-01', '2025-03-03')
+        Reservation.create('R2', 'C1', 'H1', '2025-02-27', '2025-03-01')
+        Reservation.create('R3', 'C1', 'H1', '2025-02-20', '2025-03-10')
+        occupancy = [Hotel.stats('H1', today=date(2025, 2, day))['occupancy']
+                     for day in (19, 27, 28)]
+        occupancy.append(Hotel.stats('H1', today=self.TODAY)['occupancy'])
+        self.assertEqual(occupancy, [0.0, 2 / 5, 2 / 5, 2 / 5])
+
+    def test_stats_accept_iso_today(self):
+        """Should parse today as YYYY-MM-DD, like DateRange, and reject other text."""
+        Reservation.create('R1', 'C1', 'H1', '2025-02-28', '2025-03-03')
+        self.assertEqual(Hotel.stats('H1', today='2025-03-01'),
+                         Hotel.stats('H1', today=self.TODAY))
+        self.assertIsNone(Hotel.stats('H1', today='March 1'))
+
+    def test_stats_not_found(self):
+        """Should return None when the hotel has no statistics."""
+        self.assertIsNone(Hotel.stats('GHOST'))
+
+    def test_delete_hotel_drops_stats(self):
+        """Should remove the statistics record along with the hotel."""
+        Hotel.delete('H1')
+        self.assertIsNone(Hotel.stats('H1'))
+
+    def test_modify_total_rooms_updates_occupancy(self):
+        """Should recompute occupancy against the new room count."""
+        Reservation.create('R1', 'C1', 'H1', '2025-02-28', '2025-03-03')
+        Hotel.modify('H1', total_rooms=10)
+        self.assertAlmostEqual(Hotel.stats('H1', today=self.TODAY)['occupancy'], 0.1)
+
+    def test_modify_rejects_invalid_total_rooms(self):
+        """Should reject a non-numeric room count before touching either file."""
+        self.assertFalse(Hotel.modify('H1', total_rooms='abc', name='Renamed'))
+        self.assertFalse(Hotel.modify('H1', total_rooms=-3))
+        self.assertEqual(Hotel.display('H1').name, 'Test Hotel')
+        self.assertEqual(Hotel.stats('H1', today=self.TODAY)['occupancy'], 0.0)
+        self.assertTrue(Hotel.modify('H1', total_rooms='8'))
+        self.assertEqual(load_data(HOTEL_FILE)['H1']['total_rooms'], 8)
+        self.assertEqual(load_data(STATS_FILE)['H1']['total_rooms'], 8)
+
+    def test_verify_stats_consistent(self):
+        """Should report no drift when stats match a full recomputation."""
+        Reservation.create('R1', 'C1', 'H1', '2025-04-01', '2025-04-05')
+        Reservation.create('R2', 'C1', 'H1', '2025-04-02', '2025-04-03')
+        Reservation.cancel('R1')
+        self.assertEqual(Reservation.verify_stats(), {})
+
+    def test_verify_stats_detects_and_repairs_drift(self):
+        """Should detect tampered stats and restore them when repair is set."""
+        Reservation.create('R1', 'C1', 'H1', '2025-04-01', '2025-04-05')
+        Hotel.update_stats('H1', lambda stats: dict(stats, active=7))
+        drift = Reservation.verify_stats(repair=True)
+        self.assertEqual(list(drift), ['H1'])
+        self.assertEqual(drift['H1'][1]['active'], 1)
+        self.assertEqual(Reservation.verify_stats(), {})
+
+    def test_stats_rebuilt_when_record_missing(self):
+        """Should rebuild a missing stats record once instead of skipping updates."""
+        Reservation.create('R1', 'C1', 'H1', '2025-04-01', '2025-04-05')
+        delete_record(STATS_FILE, 'H1')
+        Reservation.create('R2', 'C1', 'H1', '2025-04-02', '2025-04-03')
+        self.assertEqual(Hotel.stats('H1', today=self.TODAY)['active'], 2)
+        delete_record(STATS_FILE, 'H1')
+        self.assertEqual(Hotel.stats('H1', today=self.TODAY)['upcoming'], 2)
+        Hotel.update_stats('H1', lambda stats: {'active': 2, 'check_ins': []})
+        self.assertEqual(Hotel.stats('H1', today=self.TODAY)['upcoming'], 2)
+        self.assertEqual(Reservation.verify_stats(), {})
+
+    def test_legacy_record_with_unreadable_dates(self):
+        """Should cancel and recompute a legacy reservation whose dates do not parse."""
+        Hotel.reserve_room('H1', 'R9')
+        compare_and_set(RES_FILE, 'R9', None, {
+            'reservation_id': 'R9', 'customer_id': 'C1', 'hotel_id': 'H1',
+            'check_in': 'June 1', 'check_out': 'June 5', 'status': 'active',
+        })
+        Reservation.verify_stats(repair=True)
+        self.assertEqual(Hotel.stats('H1', today=self.TODAY)['active'], 1)
+        self.assertTrue(Reservation.cancel('R9'))
+        stats = Hotel.stats('H1', today=self.TODAY)
+        self.assertEqual((stats['active'], stats['cancelled']), (0, 1))
+        self.assertEqual(Reservation.verify_stats(), {})
 
 
 if __name__ == '__main__':